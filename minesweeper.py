@@ -1,6 +1,9 @@
+import collections
 import itertools
 import random
 
+import numpy as np
+
 
 class Minesweeper():
     """
@@ -12,23 +15,16 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = np.zeros((height, width), dtype=np.bool_)
+
+        # Add mines randomly, sampling cells without replacement
+        self.mines = set()
+        for idx in random.sample(range(height * width), mines):
+            i, j = divmod(idx, width)
+            self.mines.add((i, j))
+            self.board[i, j] = True
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -38,19 +34,17 @@ class Minesweeper():
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
-            print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
-        print("--" * self.width + "-")
+        sep = "--" * self.width + "-"
+        rows = []
+        for row in self.board:
+            rows.append(sep)
+            rows.append("|" + "|".join("X" if v else " " for v in row) + "|")
+        rows.append(sep)
+        print("\n".join(rows))
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -59,23 +53,11 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        # Sum the 3x3 window around the cell, clipped to the board,
+        # and leave the cell itself out of the count
+        i, j = cell
+        window = self.board[max(0, i - 1):i + 2, max(0, j - 1):j + 2]
+        return int(window.sum()) - int(self.board[i, j])
 
     def won(self):
         """
@@ -91,36 +73,34 @@ class Sentence():
     and a count of the number of those cells which are mines.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, ai=None):
+        self.cells = frozenset(cells)
         self.count = count
 
+        # The MinesweeperAI whose knowledge this sentence belongs to
+        self.ai = ai
+
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
-    def number_cells(self, sentence):
-        x = 0
-        for cell in sentence:
-            x += 1
-
-        return x
-
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
         result = set()
-        for cell in self.cells:
-            if cell in MinesweeperAI.mines:
-                result.add(cell)
-
-        for sentence in MinesweeperAI.knowledge:
-            if self.number_cells(sentence.cells) == sentence.count:
-                for cell in sentence:
+        knowledge = [(self.cells, self.count)]
+        if self.ai is not None:
+            for cell in self.cells:
+                if cell in self.ai.mines:
                     result.add(cell)
+            knowledge += zip(self.ai.k_cells, self.ai.k_count)
+
+        for cells, count in knowledge:
+            if cells and len(cells) == count:
+                result |= cells & self.cells
 
         return result
 
@@ -129,14 +109,16 @@ class Sentence():
         Returns the set of all cells in self.cells known to be safe.
         """
         result = set()
-        for cell in self.cells:
-            if cell in MinesweeperAI.safes:
-                result.add(cell)
-
-        for sentence in MinesweeperAI.knowledge:
-            if sentence.count == 0:
-                for cell in sentence:
+        knowledge = [(self.cells, self.count)]
+        if self.ai is not None:
+            for cell in self.cells:
+                if cell in self.ai.safes:
                     result.add(cell)
+            knowledge += zip(self.ai.k_cells, self.ai.k_count)
+
+        for cells, count in knowledge:
+            if count == 0:
+                result |= cells & self.cells
         return result
 
     def mark_mine(self, cell):
@@ -148,7 +130,7 @@ class Sentence():
         # knowledge is a list of sentence object
 
         if cell in self.cells:
-            self.cells -= {cell}
+            self.cells = self.cells - {cell}
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -157,7 +139,7 @@ class Sentence():
         a cell is known to be safe.
         """
         if cell in self.cells:
-            self.cells -= {cell}
+            self.cells = self.cells - {cell}
 
 
 class MinesweeperAI():
@@ -165,6 +147,13 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
+    # Row and column offsets of the eight cells around a cell
+    _OFFSETS = (
+        (-1, -1), (-1, 0), (-1, 1),
+        (0, -1), (0, 1),
+        (1, -1), (1, 0), (1, 1),
+    )
+
     def __init__(self, height=8, width=8):
 
         # Set initial height and width
@@ -178,8 +167,44 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells known to be safe that have not been played yet
+        self.safe_frontier = set()
+
+        # Sentences about the game known to be true, stored as parallel
+        # lists of their cells and their mine counts
+        self.k_cells = []
+        self.k_count = []
+
+        # (cells, count) keys of the sentences in the knowledge base
+        self._seen = set()
+
+        # Indices of the sentences that mention each cell, of the
+        # sentences that are new or changed since they were last checked
+        # for settled cells and for subset relations, and of emptied
+        # slots that new sentences can reuse
+        self._cell_to_sentences = {}
+        self._worklist = collections.deque()
+        self._dirty = set()
+        self._free = []
+
+        # Cells that have not been played and are not known to be mines
+        self.available = {
+            (i, j) for i in range(height) for j in range(width)
+        }
+
+        # Bitmask mirrors of moves_made and safes, one bit per cell, used
+        # to filter neighbor masks in get_neighbor_cells
+        self._moves_bits = 0
+        self._safes_bits = 0
+
+        # Bitmask of the in-bounds neighbors of every cell
+        self._neighbors = {}
+        for i in range(height):
+            for j in range(width):
+                self._neighbors[(i, j)] = sum(
+                    self._bit((i + di, j + dj)) for di, dj in self._OFFSETS
+                    if 0 <= i + di < height and 0 <= j + dj < width
+                )
 
     def mark_mine(self, cell):
         """
@@ -187,8 +212,8 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.available.discard(cell)
+        self._strip(cell, 1)
 
     def mark_safe(self, cell):
         """
@@ -196,51 +221,156 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self._safes_bits |= self._bit(cell)
+        if not self._moves_bits & self._bit(cell):
+            self.safe_frontier.add(cell)
+        self._strip(cell, 0)
+
+    def _strip(self, cell, mines):
+        """
+        Removes a settled cell from every sentence that mentions it,
+        taking `mines` off their counts, and queues those sentences.
+        """
+        for i in self._cell_to_sentences.pop(cell, ()):
+            cells = self.k_cells[i]
+            if cell not in cells:
+                continue
+            self._seen.discard((cells, self.k_count[i]))
+            cells = cells - {cell}
+            count = self.k_count[i] - mines
+
+            # A sentence that now repeats another one is emptied rather
+            # than kept, since _seen can only hold its key once
+            if (cells, count) in self._seen:
+                cells = frozenset()
+            if cells:
+                self._seen.add((cells, count))
+                self._worklist.append(i)
+                self._dirty.add(i)
+            else:
+                self._free.append(i)
+            self.k_cells[i] = cells
+            self.k_count[i] = count
+
+    def _bit(self, cell):
+        return 1 << (cell[0] * self.width + cell[1])
+
+    def _cells(self, bits):
+        """
+        Returns the set of cells whose bits are set in a bitmask.
+        """
+        cells = set()
+        while bits:
+            low = bits & -bits
+            cells.add(divmod(low.bit_length() - 1, self.width))
+            bits ^= low
+        return cells
+
+    @property
+    def knowledge(self):
+        """
+        Returns a read-only snapshot of the knowledge base as a list of
+        Sentence objects. Changing the list or its sentences does not
+        change what the AI knows; use mark_mine and mark_safe instead.
+        """
+        return [
+            Sentence(cells, count, ai=self)
+            for cells, count in zip(self.k_cells, self.k_count)
+            if cells
+        ]
+
+    def _add_sentence(self, cells, count):
+        """
+        Adds a sentence to the knowledge base unless it is empty or an
+        identical sentence is already known, queues it, and returns
+        whether it was added.
+        """
+        key = (cells, count)
+        if not cells or key in self._seen:
+            return False
+
+        self._seen.add(key)
+        if self._free:
+            index = self._free.pop()
+            self.k_cells[index] = cells
+            self.k_count[index] = count
+        else:
+            index = len(self.k_cells)
+            self.k_cells.append(cells)
+            self.k_count.append(count)
+        for cell in cells:
+            self._cell_to_sentences.setdefault(cell, []).append(index)
+        self._worklist.append(index)
+        self._dirty.add(index)
+        return True
 
     def get_neighbor_cells(self, cell):
-        # cell -> (i, j)  i -> 0~h-1 ,, j -> 0~w-1
-        neighbors = set()
-        neighbors.add((cell[0] - 1, cell[1]))  # upper cell
-        neighbors.add((cell[0] + 1, cell[1]))  # lower cell
-        neighbors.add((cell[0], cell[1] - 1))  # left
-        neighbors.add((cell[0], cell[1] + 1))  # right
-        neighbors.add((cell[0] - 1, cell[1] - 1))  # upper left
-        neighbors.add((cell[0] - 1, cell[1] + 1))  # upper right
-        neighbors.add((cell[0] + 1, cell[1] - 1))  # lower left
-        neighbors.add((cell[0] + 1, cell[1] + 1))  # lower right
-
-        res = set()
-        for cell in neighbors:
-            if cell[0] >= 0 and cell[1] >= 0 and cell[0] != 8 and cell[1] != 8:
-                if cell not in self.safes and cell not in self.moves_made:
-                    res.add(cell)
-        
-        return res
-    
-    # this function adjust the knowledge by removing the known cells 
-    def knowledge_check(self, knowledge):
-        
-        print('inside knowledge check')
-        for sentence in knowledge:
-            if len(sentence.cells) == 0:
-                knowledge.remove(sentence)
-                
-        for sentence in knowledge:
-            if sentence.count == 0:
-                for cell in sentence.cells:
-                    self.safes.add(cell)          
-                    
-            elif sentence.count == len(sentence.cells):
-                for cell in sentence.cells:
-                    self.mines.add(cell)                  
-
-        for cell in self.safes:
-            self.mark_safe(cell)
-            
-        for cell in self.mines:
-            self.mark_mine(cell)
+        """
+        Returns the in-bounds neighbors of a cell that are not
+        already known to be safe or played.
+        """
+        return self._cells(
+            self._neighbors[cell] & ~(self._safes_bits | self._moves_bits)
+        )
+
+    def infer_sentences(self):
+        """
+        Pairs every sentence that is new or changed since the last pass
+        with the sentences it shares a cell with, adds the difference
+        wherever one is a strict subset of the other, and returns whether
+        anything new was added.
+        """
+        added = False
+        touched, self._dirty = self._dirty, set()
+        for a in touched:
+            a_cells, a_count = self.k_cells[a], self.k_count[a]
+            if not a_cells:
+                continue
+
+            # Index entries can be stale, so re-check every candidate
+            others = set()
+            for cell in a_cells:
+                others.update(self._cell_to_sentences.get(cell, ()))
+            others.discard(a)
+
+            for b in others:
+                b_cells, b_count = self.k_cells[b], self.k_count[b]
+                if not b_cells:
+                    continue
+                if b_cells < a_cells:
+                    added |= self._add_sentence(
+                        a_cells - b_cells, a_count - b_count
+                    )
+                elif a_cells < b_cells:
+                    added |= self._add_sentence(
+                        b_cells - a_cells, b_count - a_count
+                    )
+
+        return added
+
+    # this function adjust the knowledge by removing the known cells
+    def knowledge_check(self):
+
+        while True:
+
+            # Only sentences that are new or lost a cell can settle
+            # anything, and settling cells queues the sentences they touch
+            while self._worklist:
+                i = self._worklist.popleft()
+                cells, count = self.k_cells[i], self.k_count[i]
+                if not cells:
+                    continue
+                if count == 0:
+                    for cell in cells - self.safes:
+                        self.mark_safe(cell)
+                elif count == len(cells):
+                    for cell in cells - self.mines:
+                        self.mark_mine(cell)
+
+            # Nothing is left to settle directly, so look for new
+            # sentences and stop once those run out as well
+            if not self.infer_sentences():
+                break
 
     def add_knowledge(self, cell, count):
         """
@@ -257,17 +387,23 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
+        self._moves_bits |= self._bit(cell)
+        self.available.discard(cell)
+        self.safe_frontier.discard(cell)
         self.mark_safe(cell)
         
-        sentence = Sentence(self.get_neighbor_cells(cell), count)
-        
-        for obj in self.knowledge:
-            if obj.cells & sentence.cells == sentence.cells:
-                self.knowledge.append(Sentence(obj.cells - sentence.cells, obj.count - sentence.count))
-                break
-                
-        self.knowledge.append(sentence)
-        self.knowledge_check(self.knowledge)
+        cells = frozenset(self.get_neighbor_cells(cell))
+
+        # Mines are only stripped from sentences when first found,
+        # so strip the ones we already know up front
+        known = cells & self.mines
+        cells -= known
+        count -= len(known)
+
+        # The new sentence is paired with every sentence it shares a
+        # cell with by infer_sentences, inside knowledge_check
+        self._add_sentence(cells, count)
+        self.knowledge_check()
         
     def make_safe_move(self):
         """
@@ -277,11 +413,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made:
-                return cell
-
-        return None
+        return next(iter(self.safe_frontier), None)
     # if there isn't a safe mode(like when the game is starting)
 
     def make_random_move(self):
@@ -292,9 +424,7 @@ class MinesweeperAI():
             2) are not known to be mines
         """
 
-        for i in range(8):
-            for j in range(8):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    return i, j
+        if self.available:
+            return random.choice(tuple(self.available))
 
         return None